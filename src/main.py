@@ -4,15 +4,30 @@ This script allows users to scrape tables and documents from a specified website
 """
 
 import argparse
+import atexit
 import logging
-from io import StringIO
-from logging.handlers import RotatingFileHandler
+import queue
+import re
+import sys
+from contextlib import closing
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import cast
 from urllib.parse import urljoin
 
-import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+if not __package__:
+    # Reason: Run as `python src/main.py`, put the project root (not src/) on the path so the package-relative
+    # imports below resolve the same way they do under `python -m src.main`
+    sys.path[0] = str(Path(__file__).resolve().parent.parent)
+    __package__ = "src"
+
+from .downloads import download_documents  # noqa: E402
+from .session import _get_session  # noqa: E402
+from .tables import extract_tables_from_soup, save_tables_as_csv  # noqa: E402
 
 
 class WebScrapingError(Exception):
@@ -21,9 +36,28 @@ class WebScrapingError(Exception):
     pass
 
 
+_LOG_LISTENER: QueueListener | None = None
+
+
+def _stop_log_listener() -> None:
+    """Flush queued log records, stop the background logging thread and close its handlers."""
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        for handler in _LOG_LISTENER.handlers:
+            handler.close()
+        _LOG_LISTENER = None
+
+
+atexit.register(_stop_log_listener)
+
+
 def configure_logging(log_dir: str, log_to_console: bool = False) -> None:
     """Configure logging to file (in the given directory) and optionally to console.
 
+    Records are put on a queue and written by a background ``QueueListener`` thread, so file and console I/O
+    stay off the calling thread.
+
     Args:
         log_dir (str): Directory where the log file will be stored.
         log_to_console (bool): If True, also log to the console.
@@ -45,17 +79,33 @@ def configure_logging(log_dir: str, log_to_console: bool = False) -> None:
         console_handler.setFormatter(formatter)
         handlers.append(console_handler)
 
+    _stop_log_listener()
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
     # Remove all existing handlers
     for h in root_logger.handlers[:]:
         root_logger.removeHandler(h)
-    for h in handlers:
-        root_logger.addHandler(h)
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(-1)
+    root_logger.addHandler(QueueHandler(log_queue))
+
+    global _LOG_LISTENER
+    _LOG_LISTENER = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _LOG_LISTENER.start()
 
 
 logger = logging.getLogger(__name__)
 
+# Only the nodes read by extract_tables_from_soup and extract_download_links
+CONTENT_STRAINER = SoupStrainer(["table", "a"])
+
+
+def _positive_int(value: str) -> int:
+    """Argparse type for strictly positive integers."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
 
 def parse_args() -> argparse.Namespace:
     """Parse command-line arguments.
@@ -93,6 +143,24 @@ def parse_args() -> argparse.Namespace:
         default=False,
         help="Download the found document links to the output directory (default: False).",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=10,
+        help="Maximum number of documents downloaded in parallel (default: 10).",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=_positive_int,
+        default=None,
+        help="Skip documents larger than this many bytes (default: no limit).",
+    )
+    parser.add_argument(
+        "--pretty-html",
+        action="store_true",
+        default=False,
+        help="Save a prettified copy of the HTML instead of the original response body (default: False).",
+    )
     parser.add_argument(
         "--log-to-console",
         action="store_true",
@@ -102,51 +170,51 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def scrape_website(url: str) -> BeautifulSoup:
+def scrape_website(url: str, strainer: SoupStrainer | None = None) -> tuple[bytes, BeautifulSoup]:
     """Fetch and parse the HTML content of a website.
 
     Args:
         url (str): The URL of the website to scrape.
+        strainer (SoupStrainer | None): If given, only build tree nodes matching it (e.g. ``CONTENT_STRAINER``),
+            which skips the cost of constructing everything else. Defaults to parsing the full document.
 
     Returns:
-        BeautifulSoup: Parsed HTML content of the page.
+        tuple[bytes, BeautifulSoup]: The raw response body and the parsed HTML content of the page.
 
     Raises:
         requests.RequestException: If the HTTP request fails.
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        # Reason: Stream so an error status is rejected before the body is read, and close the response as
+        # soon as the body is in memory so the connection goes straight back to the pool
+        with closing(_get_session().get(url, stream=True, timeout=10)) as response:
+            response.raise_for_status()
+            content: bytes = response.content
+            content_type = response.headers.get("Content-Type", "").lower()
+            encoding = response.encoding
     except requests.RequestException as exc:
-        logger.error(f"Failed to fetch {url}: {exc}", exc_info=True)
+        logger.error("Failed to fetch %s: %s", url, exc, exc_info=True)
         raise WebScrapingError(f"Failed to fetch {url}") from exc
-    # Reason: Use 'html.parser' for built-in compatibility; can switch to 'lxml' if needed
-    return BeautifulSoup(response.text, "html.parser")
+    # Reason: Hand lxml the raw bytes so it sniffs the encoding itself instead of paying for a response.text
+    # decode; only trust the HTTP charset when the server actually declared one
+    from_encoding = encoding if "charset=" in content_type else None
+    soup = BeautifulSoup(content, "lxml", from_encoding=from_encoding, parse_only=strainer)
+    return content, soup
 
 
-def extract_tables_from_soup(soup: BeautifulSoup) -> list[pd.DataFrame]:
-    """Extract all HTML tables from a BeautifulSoup object and convert them to pandas DataFrames.
+@lru_cache(maxsize=32)
+def _extension_pattern(extensions: tuple[str, ...]) -> re.Pattern[str]:
+    """Compile the link-matching regex for a set of extensions, once per distinct set.
 
     Args:
-        soup (BeautifulSoup): Parsed HTML content.
+        extensions (tuple[str, ...]): File extensions with or without the leading dot (e.g., ('.pdf',)).
 
     Returns:
-        list[pd.DataFrame]: List of DataFrames, one for each table found.
+        re.Pattern[str]: Case-insensitive pattern matching a path ending in one of the extensions, optionally
+            followed by a query string or fragment.
     """
-    tables = soup.find_all("table")
-    dataframes: list[pd.DataFrame] = []
-    for idx, table in enumerate(tables):
-        try:
-            html_str = str(table)
-            dfs: list[pd.DataFrame] = pd.read_html(StringIO(html_str))
-            if dfs and not dfs[0].empty:
-                dataframes.append(dfs[0])
-            else:
-                logger.info(f"Table {idx + 1} is empty or could not be parsed.")
-        except ValueError as exc:
-            logger.warning(f"Skipping table {idx + 1}: {exc}")
-            continue  # Reason: Skip tables that cannot be parsed by pandas
-    return dataframes
+    alternatives = "|".join(re.escape(ext.lstrip(".")) for ext in extensions)
+    return re.compile(rf"\.(?:{alternatives})(?:$|[?#])", re.IGNORECASE)
 
 
 def extract_download_links(soup: BeautifulSoup, base_url: str, extensions: list[str] | None = None) -> list[str]:
@@ -158,86 +226,39 @@ def extract_download_links(soup: BeautifulSoup, base_url: str, extensions: list[
         extensions (list[str] | None): List of file extensions to look for (e.g., ['.pdf']). Defaults to ['.pdf'].
 
     Returns:
-        list[str]: List of absolute URLs to downloadable documents.
+        list[str]: List of absolute URLs to downloadable documents. Links whose path ends in one of the
+            extensions match case-insensitively, even when followed by a query string or fragment.
     """
     if extensions is None:
         extensions = [".pdf"]
-    links: list[str] = []
-    from bs4.element import Tag
-
-    for a_tag in soup.find_all("a", href=True):
-        if not isinstance(a_tag, Tag):
-            continue
-        href = a_tag.get("href")
-        if not isinstance(href, str):
-            continue
-        if any(href.lower().endswith(ext) for ext in extensions):
-            links.append(urljoin(base_url, href))
-    return links
-
-
-def download_documents(links: list[str], output_dir: str) -> None:
-    """Download documents from the provided links to the specified output directory.
-
-    Args:
-        links (list[str]): List of document URLs to download.
-        output_dir (str): Directory to save downloaded documents.
-    """
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)  # Ensure output directory exists
-    for url in links:
-        try:
-            filename = url.split("/")[-1]
-            file_path = output_path / filename
-            response = requests.get(url, stream=True, timeout=10)
-            response.raise_for_status()
-            with open(file_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            logger.info(f"Downloaded: {filename}")
-        except requests.RequestException as exc:
-            logger.error(f"Failed to download {url}: {exc}", exc_info=True)
-        except Exception as exc:
-            logger.error(f"Unexpected error downloading {url}: {exc}", exc_info=True)
+    if not extensions:
+        return []
+    # Reason: One precompiled, case-insensitive regex replaces a lower() copy plus an any() loop per link
+    pattern = _extension_pattern(tuple(extensions))
+    # Reason: find_all with a tag name only yields Tags, and href=True guarantees a (single-valued, str) href
+    hrefs = (cast(str, cast(Tag, a_tag)["href"]) for a_tag in soup.find_all("a", href=True))
+    return [urljoin(base_url, href) for href in hrefs if pattern.search(href)]
 
 
-def save_tables_as_csv(tables: list[pd.DataFrame], output_dir: str) -> None:
-    """Save a list of pandas DataFrames as CSV files in the specified directory.
-
-    Args:
-        tables (list[pd.DataFrame]): List of DataFrames to save.
-        output_dir (str): Directory to save CSV files.
-    """
-    output_path = Path(output_dir)
-    for idx, df in enumerate(tables):
-        csv_path = output_path / f"table_{idx + 1}.csv"
-        try:
-            df.to_csv(csv_path, index=False)
-            logger.info(f"Saved table {idx + 1} to {csv_path}")
-        except Exception as exc:
-            logger.error(f"Failed to save table {idx + 1} to {csv_path}: {exc}", exc_info=True)
+def save_html_content(html: bytes | BeautifulSoup, output_dir: str) -> None:
+    """Save HTML content to a file in the specified directory.
 
-
-def save_html_content(soup: BeautifulSoup, output_dir: str) -> None:
-    """Save the BeautifulSoup HTML content to a file in the specified directory.
+    Raw bytes are written verbatim. A BeautifulSoup object is prettified first, which walks the whole tree.
 
     Args:
-        soup (BeautifulSoup): Parsed HTML content to save.
+        html (bytes | BeautifulSoup): Raw page body, or parsed HTML content to prettify and save.
         output_dir (str): Directory to save the HTML file.
     """
     output_path = Path(output_dir)
     html_path = output_path / "scraped_content.html"
 
-    prettified = soup.prettify()
-    if not isinstance(prettified, str):
-        prettified = str(prettified)
+    data = html.prettify(encoding="utf-8") if isinstance(html, BeautifulSoup) else html
     try:
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(prettified)
-        logger.info(f"Saved HTML content to {html_path}")
+        with open(html_path, "wb") as f:
+            f.write(data)
+        logger.info("Saved HTML content to %s", html_path)
     except Exception as exc:
-        logger.error(f"Failed to save HTML content to {html_path}: {exc}", exc_info=True)
+        logger.error("Failed to save HTML content to %s: %s", html_path, exc, exc_info=True)
 
 
 def main() -> None:
@@ -247,25 +268,28 @@ def main() -> None:
     # Configure logging to use the output directory specified by the user and log-to-console flag
     configure_logging(args.output, log_to_console=args.log_to_console)
     logger.info("Webscraping utility is running.")
-    logger.info(f"URL to scrape: {args.url}")
-    logger.info(f"Output directory: {args.output}")
+    logger.info("URL to scrape: %s", args.url)
+    logger.info("Output directory: %s", args.output)
 
     output_path = Path(args.output)
     output_path.mkdir(parents=True, exist_ok=True)
 
+    # Reason: The archive is written from the raw body, so the tree only needs the nodes the extractors read;
+    # --pretty-html renders the archive from the tree and therefore needs the full document
+    strainer = None if args.pretty_html else CONTENT_STRAINER
     try:
-        soup = scrape_website(args.url)
+        raw_html, soup = scrape_website(args.url, strainer=strainer)
     except WebScrapingError as exc:
-        logger.error(f"Aborting: {exc}")
+        logger.error("Aborting: %s", exc)
         return
 
     # Always save the HTML content
-    save_html_content(soup, args.output)
+    save_html_content(soup if args.pretty_html else raw_html, args.output)
 
     # Extract and save tables if requested
     if args.download_tables:
         tables = extract_tables_from_soup(soup)
-        save_tables_as_csv(tables, args.output)
+        save_tables_as_csv(tables, output_path)
 
     # Find and print download links if requested
     download_links: list[str] = []
@@ -278,9 +302,7 @@ def main() -> None:
 
     # Download documents if requested
     if args.download_documents and download_links:
-        download_documents(download_links, args.output)
-
-    # Note: For production workloads, consider using async libraries (e.g., httpx, aiofiles) for I/O-bound operations.
+        download_documents(download_links, output_path, concurrency=args.concurrency, max_bytes=args.max_bytes)
 
 
 if __name__ == "__main__":
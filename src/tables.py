@@ -0,0 +1,260 @@
+"""Extraction of HTML tables into pandas DataFrames and saving them as CSV files."""
+
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import StringIO
+from itertools import repeat
+from pathlib import Path
+from typing import Literal
+
+import pandas as pd
+from bs4 import BeautifulSoup, Tag
+from pandas.io.parsers import TextParser
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_TABLE_THRESHOLD = 4
+# Same cell-text whitespace normalisation as pd.read_html
+_HTML_WHITESPACE_RE = re.compile(r"[\r\n]+|\s{2,}")
+
+
+def _parse_one_table(html_str: str) -> tuple[pd.DataFrame | None, str | None]:
+    """Parse a single HTML table into a DataFrame.
+
+    Kept at module level so it can be pickled and dispatched to worker processes. Errors are returned rather
+    than logged because worker processes do not share the parent's logging thread.
+
+    Args:
+        html_str (str): HTML markup of one ``<table>`` element.
+
+    Returns:
+        tuple[pd.DataFrame | None, str | None]: The parsed table (None if pandas could not parse it) and the
+            parse error message, if any.
+    """
+    try:
+        dfs: list[pd.DataFrame] = pd.read_html(StringIO(html_str), flavor="lxml")
+    except ValueError as exc:
+        return None, str(exc)  # Reason: Skip tables that cannot be parsed by pandas
+    return (dfs[0] if dfs else None), None
+
+
+def _parse_tables_batch(html_strings: list[str]) -> list[pd.DataFrame] | None:
+    """Parse several HTML tables with one ``pd.read_html`` call, so the parser is only set up once.
+
+    Only call this when no table is hidden or contains a nested table: ``read_html`` drops hidden tables and
+    emits nested ones separately, so the frames would no longer line up with the inputs even when their counts
+    happen to match.
+
+    Args:
+        html_strings (list[str]): HTML markup of the ``<table>`` elements, in document order.
+
+    Returns:
+        list[pd.DataFrame] | None: One DataFrame per input table, or None if the batch could not be parsed or
+            did not yield exactly one table per input (e.g. because a table has no text).
+    """
+    try:
+        dfs: list[pd.DataFrame] = pd.read_html(StringIO("".join(html_strings)), flavor="lxml")
+    except ValueError as exc:
+        logger.debug("Batched table parse failed, falling back to per-table parsing: %r", exc)
+        return None
+    return dfs if len(dfs) == len(html_strings) else None
+
+
+def _is_hidden(tag: Tag) -> bool:
+    """Check whether an element is hidden with an inline ``display:none`` style, the test ``read_html`` uses.
+
+    Args:
+        tag (Tag): Element to check.
+
+    Returns:
+        bool: True if the element's ``style`` attribute contains ``display:none``.
+    """
+    return "display:none" in str(tag.get("style", "")).replace(" ", "")
+
+
+def _row_cells(tr: Tag) -> list[Tag]:
+    """Return the ``<td>``/``<th>`` cells of a table row.
+
+    Args:
+        tr (Tag): A ``<tr>`` element.
+
+    Returns:
+        list[Tag]: The row's cells, in order.
+    """
+    return tr.find_all(["td", "th"], recursive=False)
+
+
+def _row_text(tr: Tag) -> list[str]:
+    """Return the text of each cell in a table row, whitespace-normalised as ``read_html`` does.
+
+    Args:
+        tr (Tag): A ``<tr>`` element.
+
+    Returns:
+        list[str]: Cell texts, in order.
+    """
+    return [_HTML_WHITESPACE_RE.sub(" ", cell.get_text().strip()) for cell in _row_cells(tr)]
+
+
+def _table_to_df(table: Tag) -> pd.DataFrame | None:
+    """Build a DataFrame directly from a table's cells, without re-serialising and re-parsing its HTML.
+
+    Rows are split into header, body and footer the way ``pd.read_html`` does: ``<thead>`` rows form the header
+    (or, without a ``<thead>``, a leading row made only of ``<th>`` cells), ``<tfoot>`` rows come last and ragged
+    rows are padded. The cell texts then go through the same ``TextParser`` conversion as ``read_html``, so NA
+    markers such as "N/A" become blanks and "1,000" becomes 1000, and the CSV output does not depend on which
+    reader handled a table.
+
+    Args:
+        table (Tag): A ``<table>`` element.
+
+    Returns:
+        pd.DataFrame | None: The table as a DataFrame, or None if its layout (spanned cells, nested tables,
+            hidden elements, line breaks, multi-row headers, rows wider than the header) needs the full
+            ``pd.read_html`` parser.
+    """
+    if _is_hidden(table):
+        return None
+    # Reason: One walk over the subtree instead of a separate find() pass per feature only read_html handles;
+    # <br> becomes a space and <style>/<script> text is kept by read_html but not by get_text()
+    for node in table.descendants:
+        if isinstance(node, Tag) and (
+            node.name in ("table", "br", "style", "script")
+            or "rowspan" in node.attrs
+            or "colspan" in node.attrs
+            or _is_hidden(node)
+        ):
+            return None
+    head_rows: list[Tag] = []
+    tbody_rows: list[Tag] = []
+    root_rows: list[Tag] = []
+    foot_rows: list[Tag] = []
+    for section in table.find_all(["thead", "tbody", "tfoot", "tr"], recursive=False):
+        if section.name == "tr":
+            root_rows.append(section)
+        elif section.name == "thead":
+            # Cells directly under <thead> (no <tr>) are a malformed header only read_html patches up
+            if section.find(["td", "th"], recursive=False):
+                return None
+            head_rows.extend(section.find_all("tr", recursive=False))
+        elif section.name == "tbody":
+            tbody_rows.extend(section.find_all("tr"))
+        else:
+            foot_rows.extend(section.find_all("tr"))
+    body_rows = tbody_rows + root_rows
+    if not head_rows:
+        while body_rows and all(cell.name == "th" for cell in _row_cells(body_rows[0])):
+            head_rows.append(body_rows.pop(0))
+    if len(head_rows) > 1:
+        return None
+    header = [_row_text(tr) for tr in head_rows]
+    rows = [_row_text(tr) for tr in body_rows + foot_rows]
+    if header and any(len(row) > len(header[0]) for row in rows):
+        return None
+    rows = header + rows
+    width = max((len(row) for row in rows), default=0)
+    if width == 0:
+        return pd.DataFrame()
+    for row in rows:
+        row.extend([""] * (width - len(row)))
+    with TextParser(rows, header=0 if header else None, thousands=",") as parser:
+        return parser.read()
+
+
+def extract_tables_from_soup(
+    soup: BeautifulSoup, backend: Literal["direct", "pandas"] = "direct"
+) -> list[pd.DataFrame]:
+    """Extract all HTML tables from a BeautifulSoup object and convert them to pandas DataFrames.
+
+    With the ``direct`` backend, simple tables are read straight from the parse tree. Tables with spanned cells
+    or nested tables, and every table under the ``pandas`` backend, go through a single batched ``pd.read_html``
+    call; if that fails they are parsed one by one, in a process pool when there are at least
+    ``PARALLEL_TABLE_THRESHOLD`` of them.
+
+    Args:
+        soup (BeautifulSoup): Parsed HTML content.
+        backend (Literal["direct", "pandas"]): Table reader to use for simple tables. Defaults to "direct".
+
+    Raises:
+        ValueError: If ``backend`` is not a known table reader.
+
+    Returns:
+        list[pd.DataFrame]: List of DataFrames, one for each table found.
+    """
+    if backend not in ("direct", "pandas"):
+        raise ValueError(f"Unknown table backend: {backend!r}")
+    results: list[pd.DataFrame | None] = []
+    complex_tables: dict[int, Tag] = {}
+    for idx, table in enumerate(soup.find_all("table")):
+        df = _table_to_df(table) if backend == "direct" else None
+        if df is None:
+            complex_tables[idx] = table
+        results.append(df)
+
+    html_strings = [str(table) for table in complex_tables.values()]
+    # Reason: Batched frames are matched to tables by position, which only holds when read_html yields exactly
+    # one frame per table; nested tables add frames and hidden tables are dropped
+    batchable = len(html_strings) > 1 and not any(
+        _is_hidden(table) or table.find("table") for table in complex_tables.values()
+    )
+    batch = _parse_tables_batch(html_strings) if batchable else None
+    parsed: list[tuple[pd.DataFrame | None, str | None]]
+    if batch is not None:
+        parsed = [(df, None) for df in batch]
+    # Reason: Parsing is CPU-bound and holds the GIL; below the threshold, pool start-up costs more than it saves
+    elif len(html_strings) >= PARALLEL_TABLE_THRESHOLD:
+        # Reason: Forking copies the logging QueueListener thread's lock state into workers; start them from a
+        # clean process instead (forkserver where available, otherwise spawn)
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(
+            max_workers=os.cpu_count(), mp_context=multiprocessing.get_context(method)
+        ) as executor:
+            parsed = list(executor.map(_parse_one_table, html_strings, chunksize=4))
+    else:
+        parsed = [_parse_one_table(html_str) for html_str in html_strings]
+    for idx, (df, error) in zip(complex_tables, parsed):
+        if error is not None:
+            logger.warning("Skipping table %d: %s", idx + 1, error)
+        results[idx] = df
+
+    dataframes: list[pd.DataFrame] = []
+    for idx, df in enumerate(results):
+        if df is not None and not df.empty:
+            dataframes.append(df)
+        else:
+            logger.info("Table %d is empty or could not be parsed.", idx + 1)
+    return dataframes
+
+
+def _save_table(idx: int, df: pd.DataFrame, output_path: Path) -> None:
+    """Save one DataFrame as ``table_<n>.csv``, logging rather than raising on failure.
+
+    Args:
+        idx (int): Zero-based position of the table on the page.
+        df (pd.DataFrame): DataFrame to save.
+        output_path (Path): Directory to save the CSV file in.
+    """
+    csv_path = output_path / f"table_{idx + 1}.csv"
+    try:
+        df.to_csv(csv_path, index=False)
+        logger.info("Saved table %d to %s", idx + 1, csv_path)
+    except Exception as exc:
+        logger.error("Failed to save table %d to %s: %r", idx + 1, csv_path, exc, exc_info=True)
+
+
+def save_tables_as_csv(tables: list[pd.DataFrame], output_path: Path) -> None:
+    """Save a list of pandas DataFrames as CSV files in the specified directory.
+
+    Tables are written from a small thread pool so the file writes overlap.
+
+    Args:
+        tables (list[pd.DataFrame]): List of DataFrames to save.
+        output_path (Path): Directory to save CSV files.
+    """
+    if not tables:
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(tables))) as executor:
+        list(executor.map(_save_table, range(len(tables)), tables, repeat(output_path)))
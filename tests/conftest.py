@@ -4,6 +4,9 @@ This module contains shared fixtures and configuration settings for pytest.
 """
 
 import sys
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 import pytest
@@ -13,6 +16,39 @@ src_path = str(Path(__file__).parent.parent)
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
+HTML_WITH_TABLE = """
+<html>
+  <body>
+    <table>
+      <tr><th>Col1</th><th>Col2</th></tr>
+      <tr><td>A</td><td>1</td></tr>
+      <tr><td>B</td><td>2</td></tr>
+    </table>
+  </body>
+</html>
+"""
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register the suite's custom markers.
+
+    Args:
+        config (pytest.Config): The pytest configuration object.
+    """
+    config.addinivalue_line("markers", "integration: end-to-end tests that exercise several components together")
+    config.addinivalue_line("markers", "io: tests that touch the filesystem")
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    """Mark tests that use a temporary directory as ``io`` so they can be selected or deselected with ``-m``.
+
+    Args:
+        items (list[pytest.Item]): Collected test items.
+    """
+    for item in items:
+        if "tmp_path" in getattr(item, "fixturenames", ()):
+            item.add_marker(pytest.mark.io)
+
 
 @pytest.fixture
 def sample_html() -> str:
@@ -48,3 +84,67 @@ def temp_output_dir(tmp_path: Path) -> Path:
         Path: Path to the temporary output directory
     """
     return tmp_path / "output"
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    """Serve canned responses registered on the owning ``FakeHTTPServer``."""
+
+    server: "FakeHTTPServer"
+
+    def do_GET(self) -> None:  # noqa: N802 - name required by BaseHTTPRequestHandler
+        self._respond()
+
+    def do_HEAD(self) -> None:  # noqa: N802 - name required by BaseHTTPRequestHandler
+        self._respond()
+
+    def _respond(self) -> None:
+        self.server.request_log.append((self.command, self.path, dict(self.headers)))
+        status, headers, body = self.server.routes.get(self.path, (404, {}, b"not found"))
+        etag = headers.get("ETag")
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Silence the default stderr request logging."""
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    """Local HTTP server used to exercise real network code paths without hitting live websites."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeHandler)
+        self.routes: dict[str, tuple[int, dict[str, str], bytes]] = {}
+        self.request_log: list[tuple[str, str, dict[str, str]]] = []
+
+    def url_for(self, path: str) -> str:
+        """Return the absolute URL for a path on this server."""
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}{path}"
+
+
+@pytest.fixture
+def http_server() -> Iterator[FakeHTTPServer]:
+    """Run a local HTTP server in a background thread for the duration of a test.
+
+    Yields:
+        FakeHTTPServer: Server whose ``routes`` map request paths to ``(status, headers, body)``.
+    """
+    server = FakeHTTPServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,36 @@
+"""Timing regression tests; skipped unless pytest-benchmark is installed."""
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from bs4 import BeautifulSoup  # noqa: E402
+
+from src.tables import extract_tables_from_soup  # noqa: E402
+
+if TYPE_CHECKING:
+    from pytest_benchmark.fixture import BenchmarkFixture
+
+
+@pytest.mark.benchmark(group="html_tables")
+def test_extract_tables_from_soup_many_medium_tables(benchmark: "BenchmarkFixture") -> None:
+    """Ten 300x15 tables in one page, the shape that makes a single combined ``read_html`` pass go quadratic.
+
+    Args:
+        benchmark (BenchmarkFixture): pytest-benchmark fixture.
+    """
+    rng = np.random.default_rng(0)
+    dfs = [pd.DataFrame(rng.integers(0, 100, (300, 15)))] * 10
+    soup = BeautifulSoup("\n".join(df.to_html() for df in dfs), "lxml")
+
+    result = benchmark(extract_tables_from_soup, soup)
+
+    assert len(result) == 10
+    assert all(df.shape == (300, 16) for df in result)
+    # Reason: Stats are only collected when benchmarking is enabled (not under --benchmark-disable or xdist)
+    if benchmark.enabled:
+        assert benchmark.stats["mean"] < 1.0
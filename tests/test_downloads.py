@@ -0,0 +1,212 @@
+"""Tests for src.downloads."""
+
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from aiohttp import web
+
+from src.downloads import (
+    DOWNLOAD_BUFFER_SIZE,
+    HTTP_CACHE_FILENAME,
+    _plan_filenames,
+    download_documents,
+    download_documents_async,
+)
+from src.session import DEFAULT_HEADERS
+from tests.conftest import FakeHTTPServer
+
+
+def test_download_documents(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/doc1.pdf"] = (200, {"Content-Type": "application/pdf"}, b"testdata")
+    links = [http_server.url_for("/doc1.pdf")]
+    download_documents(links, tmp_path)
+    assert (tmp_path / "doc1.pdf").is_file()
+    assert (tmp_path / "doc1.pdf").read_bytes() == b"testdata"
+
+
+def test_download_documents_concurrent(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    for i in range(5):
+        http_server.routes[f"/doc{i}.pdf"] = (200, {}, f"data{i}".encode())
+    links = [http_server.url_for(f"/doc{i}.pdf") for i in range(5)]
+    download_documents(links, tmp_path, concurrency=2)
+    for i in range(5):
+        assert (tmp_path / f"doc{i}.pdf").read_bytes() == f"data{i}".encode()
+
+
+@pytest.mark.asyncio
+async def test_download_documents_async(tmp_path: Path, aiohttp_server) -> None:
+    payload = os.urandom(8 * 1024)
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(body=payload, content_type="application/pdf")
+
+    app = web.Application()
+    app.router.add_route("*", "/docs/{name}", handler)
+    server = await aiohttp_server(app)
+    links = [str(server.make_url(f"/docs/doc{i}.pdf")) for i in range(32)]
+    await download_documents_async(links, tmp_path, concurrency=16)
+    files = sorted(tmp_path.glob("doc*.pdf"))
+    assert len(files) == 32
+    assert all(f.read_bytes() == payload for f in files)
+
+
+def test_download_documents_large_file(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    payload = os.urandom(DOWNLOAD_BUFFER_SIZE * 2 + 123)
+    http_server.routes["/big.pdf"] = (200, {}, payload)
+    download_documents([http_server.url_for("/big.pdf")], tmp_path)
+    assert (tmp_path / "big.pdf").read_bytes() == payload
+
+
+def test_download_documents_dedupes_and_resolves_collisions(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/a/doc.pdf"] = (200, {}, b"first")
+    http_server.routes["/b/doc.pdf"] = (200, {}, b"second")
+    first, second = http_server.url_for("/a/doc.pdf"), http_server.url_for("/b/doc.pdf")
+    download_documents([first, second, first], tmp_path)
+    # The repeated URL is fetched once and the second doc.pdf does not overwrite the first
+    assert [entry[:2] for entry in http_server.request_log].count(("GET", "/a/doc.pdf")) == 1
+    assert (tmp_path / "doc.pdf").read_bytes() == b"first"
+    renamed = list(tmp_path.glob("doc_*.pdf"))
+    assert len(renamed) == 1 and renamed[0].read_bytes() == b"second"
+
+
+def test_plan_filenames() -> None:
+    planned = _plan_filenames(
+        [
+            "http://example.com/files/report.pdf?version=2",
+            "http://example.com/",
+            "http://example.com/a/..",
+            "http://example.com/files/report.pdf?version=2",
+        ]
+    )
+    assert list(planned.values())[0] == "report.pdf"
+    assert planned["http://example.com/"] == "index"
+    assert planned["http://example.com/a/.."].startswith("index_")
+    assert len(planned) == 3
+
+
+def test_download_documents_requests_compression(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/doc1.pdf"] = (200, {"Content-Encoding": "gzip"}, gzip.compress(b"testdata" * 100))
+    download_documents([http_server.url_for("/doc1.pdf")], tmp_path)
+    request_headers = http_server.request_log[-1][2]
+    assert "br" in request_headers["Accept-Encoding"]
+    assert request_headers["User-Agent"] == DEFAULT_HEADERS["User-Agent"]
+    # The body is transparently decompressed before it is written
+    assert (tmp_path / "doc1.pdf").read_bytes() == b"testdata" * 100
+
+
+def test_download_documents_starts_smallest_first(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    for name, size in [("large", 3000), ("small", 10), ("medium", 500)]:
+        http_server.routes[f"/{name}.pdf"] = (200, {}, b"x" * size)
+    links = [http_server.url_for(f"/{name}.pdf") for name in ("large", "small", "medium")]
+    download_documents(links, tmp_path, concurrency=1)
+    gets = [path for method, path, _ in http_server.request_log if method == "GET"]
+    assert gets == ["/small.pdf", "/medium.pdf", "/large.pdf"]
+
+
+def test_download_documents_preallocates_known_sizes(
+    tmp_path: Path, http_server: FakeHTTPServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    threads: list[threading.Thread] = []
+    fallocate = mock.Mock(side_effect=lambda *args: threads.append(threading.current_thread()))
+    monkeypatch.setattr("os.posix_fallocate", fallocate, raising=False)
+    http_server.routes["/doc1.pdf"] = (200, {}, b"testdata")
+    download_documents([http_server.url_for("/doc1.pdf")], tmp_path)
+    assert fallocate.call_args.args[1:] == (0, len(b"testdata"))
+    # Preallocation can write the whole file, so it must not run on the event loop's thread
+    assert threads and threads[0] is not threading.main_thread()
+    assert (tmp_path / "doc1.pdf").read_bytes() == b"testdata"
+
+
+def test_download_documents_max_bytes(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/small.pdf"] = (200, {}, b"x" * 10)
+    http_server.routes["/big.pdf"] = (200, {}, b"x" * 1000)
+    # Compressed size is under the limit, so only the streamed size can catch it
+    http_server.routes["/bomb.pdf"] = (200, {"Content-Encoding": "gzip"}, gzip.compress(b"x" * 5000))
+    links = [http_server.url_for(path) for path in ("/small.pdf", "/big.pdf", "/bomb.pdf")]
+    download_documents(links, tmp_path, max_bytes=100)
+    assert (tmp_path / "small.pdf").exists()
+    assert not (tmp_path / "big.pdf").exists()
+    assert not (tmp_path / "bomb.pdf").exists()
+    assert ("GET", "/big.pdf") not in [entry[:2] for entry in http_server.request_log]
+    assert list(tmp_path.glob("*.part")) == []
+
+
+def test_download_documents_logs_http_errors(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/ok.pdf"] = (200, {}, b"ok")
+    links = [http_server.url_for("/missing.pdf"), http_server.url_for("/ok.pdf")]
+    download_documents(links, tmp_path)
+    # A failing link must not prevent the others from downloading
+    assert not (tmp_path / "missing.pdf").exists()
+    assert (tmp_path / "ok.pdf").read_bytes() == b"ok"
+
+
+def test_download_documents_skips_not_modified(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/doc1.pdf"] = (200, {"ETag": '"v1"'}, b"testdata")
+    links = [http_server.url_for("/doc1.pdf")]
+    download_documents(links, tmp_path)
+    cache = json.loads((tmp_path / HTTP_CACHE_FILENAME).read_text(encoding="utf-8"))
+    assert cache[links[0]]["etag"] == '"v1"'
+
+    (tmp_path / "doc1.pdf").write_bytes(b"local copy")
+    download_documents(links, tmp_path)
+    assert http_server.request_log[-1][2]["If-None-Match"] == '"v1"'
+    # 304 Not Modified must leave the existing file untouched
+    assert (tmp_path / "doc1.pdf").read_bytes() == b"local copy"
+
+
+def test_download_documents_ignores_cache_entry_for_another_file(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/a/doc.pdf"] = (200, {"ETag": '"A"'}, b"content A")
+    http_server.routes["/b/doc.pdf"] = (200, {"ETag": '"B"'}, b"content B")
+    url_a, url_b = http_server.url_for("/a/doc.pdf"), http_server.url_for("/b/doc.pdf")
+    download_documents([url_a, url_b], tmp_path)
+    assert (tmp_path / "doc.pdf").read_bytes() == b"content A"
+    cache = json.loads((tmp_path / HTTP_CACHE_FILENAME).read_text(encoding="utf-8"))
+    assert cache[url_a]["filename"] == "doc.pdf"
+    assert cache[url_b]["filename"] != "doc.pdf"
+
+    # B alone now maps to doc.pdf, which still holds A's bytes: its cached ETag must not be sent
+    download_documents([url_b], tmp_path)
+    assert "If-None-Match" not in http_server.request_log[-1][2]
+    assert (tmp_path / "doc.pdf").read_bytes() == b"content B"
+
+
+def test_download_documents_refetches_missing_file(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/doc1.pdf"] = (200, {"ETag": '"v1"'}, b"testdata")
+    links = [http_server.url_for("/doc1.pdf")]
+    download_documents(links, tmp_path)
+    (tmp_path / "doc1.pdf").unlink()
+    download_documents(links, tmp_path)
+    assert "If-None-Match" not in http_server.request_log[-1][2]
+    assert (tmp_path / "doc1.pdf").read_bytes() == b"testdata"
+
+
+def test_download_documents_honours_no_store(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/doc1.pdf"] = (200, {"ETag": '"v1"', "Cache-Control": "no-store"}, b"testdata")
+    links = [http_server.url_for("/doc1.pdf")]
+    download_documents(links, tmp_path)
+    cache = json.loads((tmp_path / HTTP_CACHE_FILENAME).read_text(encoding="utf-8"))
+    assert "etag" not in cache[links[0]]
+    assert "sha256" in cache[links[0]]
+
+
+def test_download_documents_does_not_rewrite_unchanged_content(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    http_server.routes["/doc1.pdf"] = (200, {}, b"testdata")
+    links = [http_server.url_for("/doc1.pdf")]
+    download_documents(links, tmp_path)
+    file_path = tmp_path / "doc1.pdf"
+    os.utime(file_path, ns=(0, 0))
+    download_documents(links, tmp_path)
+    assert file_path.stat().st_mtime_ns == 0
+    assert not (tmp_path / "doc1.pdf.part").exists()
+
+
+def test_download_documents_ignores_corrupt_cache(tmp_path: Path, http_server: FakeHTTPServer) -> None:
+    (tmp_path / HTTP_CACHE_FILENAME).write_text("{not json", encoding="utf-8")
+    http_server.routes["/doc1.pdf"] = (200, {}, b"testdata")
+    download_documents([http_server.url_for("/doc1.pdf")], tmp_path)
+    assert (tmp_path / "doc1.pdf").read_bytes() == b"testdata"
@@ -0,0 +1,201 @@
+"""Tests for src.tables."""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup
+
+from src.tables import (
+    PARALLEL_TABLE_THRESHOLD,
+    _parse_one_table,
+    _parse_tables_batch,
+    extract_tables_from_soup,
+    save_tables_as_csv,
+)
+from tests.conftest import HTML_WITH_TABLE
+
+# Parsed once at import; none of the tests mutate this tree
+_TABLE_SOUP = BeautifulSoup(HTML_WITH_TABLE, "lxml")
+
+
+@pytest.mark.parametrize("backend", ["direct", "pandas"])
+def test_extract_tables_from_soup(backend: str) -> None:
+    dfs = extract_tables_from_soup(_TABLE_SOUP, backend=backend)
+    assert len(dfs) == 1
+    assert isinstance(dfs[0], pd.DataFrame)
+    assert list(dfs[0].columns) == ["Col1", "Col2"]
+    assert dfs[0].iloc[0, 0] == "A"
+
+
+def test_extract_tables_from_soup_no_tables() -> None:
+    soup = BeautifulSoup("<html><body>No tables here</body></html>", "html.parser")
+    dfs = extract_tables_from_soup(soup)
+    assert dfs == []
+
+
+def test_extract_tables_from_soup_parallel() -> None:
+    tables = "".join(
+        f"<table><tr><th colspan='2'>Group</th></tr><tr><td>T{i}</td><td>{i}</td></tr></table>"
+        for i in range(PARALLEL_TABLE_THRESHOLD + 1)
+    )
+    soup = BeautifulSoup(f"<html><body>{HTML_WITH_TABLE}{tables}</body></html>", "html.parser")
+    with (
+        mock.patch("src.tables._parse_tables_batch", return_value=None),
+        mock.patch("src.tables.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool,
+    ):
+        dfs = extract_tables_from_soup(soup)
+    pool.assert_called_once()
+    # Workers must not be forked from the parent, whose logging thread may hold locks
+    assert pool.call_args.kwargs["mp_context"].get_start_method() in ("forkserver", "spawn")
+    # Spanned tables come back from the pool in document order, after the directly-read simple table
+    assert [df.iloc[0, 0] for df in dfs] == ["A"] + [f"T{i}" for i in range(PARALLEL_TABLE_THRESHOLD + 1)]
+
+
+def test_extract_tables_from_soup_batches_complex_tables() -> None:
+    tables = "".join(
+        f"<table><tr><th colspan='2'>Group</th></tr><tr><td>T{i}</td><td>{i}</td></tr></table>" for i in range(3)
+    )
+    soup = BeautifulSoup(f"<html><body>{tables}</body></html>", "html.parser")
+    with mock.patch("src.tables.pd.read_html", wraps=pd.read_html) as read_html:
+        dfs = extract_tables_from_soup(soup)
+    read_html.assert_called_once()
+    assert [df.iloc[0, 0] for df in dfs] == ["T0", "T1", "T2"]
+
+
+def test_extract_tables_from_soup_nested_tables_fall_back_per_table() -> None:
+    html = """
+    <table><tr><td>outer<table><tr><td>inner</td></tr></table></td></tr></table>
+    <table><tr><td colspan="2">wide</td></tr></table>
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    with mock.patch("src.tables._parse_one_table", wraps=_parse_one_table) as parse_one:
+        dfs = extract_tables_from_soup(soup)
+    # A nested table would make the batch yield an extra frame, so each complex table is parsed on its own
+    assert parse_one.call_count == 2
+    assert len(dfs) == 3
+
+
+def test_extract_tables_from_soup_nested_and_hidden_tables_keep_their_slots(caplog: pytest.LogCaptureFixture) -> None:
+    html = """
+    <table><tr><td colspan="2">OUTER<table><tr><td>INNER</td></tr></table></td></tr></table>
+    <table style="display:none"><tr><td colspan="2">HIDDEN</td></tr></table>
+    """
+    soup = BeautifulSoup(html, "lxml")
+    with (
+        mock.patch("src.tables._parse_tables_batch", wraps=_parse_tables_batch) as batch,
+        caplog.at_level(logging.WARNING, logger="src.tables"),
+    ):
+        dfs = extract_tables_from_soup(soup)
+    batch.assert_not_called()
+    # The outer and nested tables each yield one frame; the hidden table is skipped like read_html does
+    assert len(dfs) == 2
+    assert dfs[0].iloc[0, 0] == "OUTERINNER"
+    assert dfs[1].iloc[0, 0] == "INNER"
+    assert "Skipping table 3" in caplog.text
+
+
+def test_parse_one_table_without_a_visible_table_reports_an_error() -> None:
+    df, error = _parse_one_table('<table style="display:none"><tr><td>x</td></tr></table>')
+    assert df is None
+    assert error is not None
+
+
+def test_extract_tables_from_soup_headerless_and_ragged(caplog: pytest.LogCaptureFixture) -> None:
+    html = """
+    <table><tr><td>a</td><td>1</td></tr><tr><td>b</td></tr></table>
+    <table><tr><th>Name</th></tr><tr><td>x</td><td>extra</td></tr></table>
+    <table></table>
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    with mock.patch("src.tables._parse_one_table", return_value=(None, "bad table")) as parse_one:
+        with caplog.at_level(logging.WARNING, logger="src.tables"):
+            dfs = extract_tables_from_soup(soup)
+    # Rows wider than the header are handed to pandas; the empty table is skipped
+    parse_one.assert_called_once()
+    assert "Skipping table 2: bad table" in caplog.text
+    assert len(dfs) == 1
+    # The short row is padded like read_html does, which makes the numeric column float
+    expected = pd.read_html(StringIO("<table><tr><td>a</td><td>1</td></tr><tr><td>b</td></tr></table>"))[0]
+    pd.testing.assert_frame_equal(dfs[0], expected)
+    assert list(dfs[0].columns) == [0, 1]
+    assert dfs[0].iloc[1, 0] == "b"
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        HTML_WITH_TABLE,
+        # <thead> row of <td> cells is still the header
+        "<table><thead><tr><td>Name</td><td>Qty</td></tr></thead><tbody><tr><td>x</td><td>1</td></tr></tbody></table>",
+        # Hidden sort keys are dropped
+        "<table><tr><th>Name</th></tr><tr><td><span style='display: none'>zz</span>Alpha</td></tr></table>",
+        # <tfoot> before <tbody> still comes out last
+        "<table><thead><tr><th>A</th></tr></thead><tfoot><tr><td>total</td></tr></tfoot>"
+        "<tbody><tr><td>row</td></tr></tbody></table>",
+        # NA markers and thousands separators
+        "<table><tr><th>A</th><th>B</th></tr><tr><td>N/A</td><td>1,000</td></tr><tr><td>x</td><td>2</td></tr></table>",
+        # Whitespace and line breaks inside cells
+        "<table><tr><th>A</th></tr><tr><td>  two\n lines<br>and  more </td></tr></table>",
+    ],
+)
+def test_extract_tables_from_soup_matches_read_html_text(html: str) -> None:
+    direct = extract_tables_from_soup(BeautifulSoup(html, "lxml"))[0]
+    expected = pd.read_html(StringIO(html), flavor="lxml")[0]
+    pd.testing.assert_frame_equal(direct, expected)
+    assert direct.to_csv(index=False) == expected.to_csv(index=False)
+
+
+def test_extract_tables_from_soup_backends_agree() -> None:
+    tables = HTML_WITH_TABLE + "<table><tr><th>n</th><th>label</th></tr><tr><td>1</td><td>one</td></tr></table>"
+    soup = BeautifulSoup(tables, "lxml")
+    direct = extract_tables_from_soup(soup, backend="direct")
+    via_pandas = extract_tables_from_soup(soup, backend="pandas")
+    assert len(direct) == len(via_pandas) == 2
+    for left, right in zip(direct, via_pandas):
+        pd.testing.assert_frame_equal(left, right)
+
+
+def test_extract_tables_from_soup_unknown_backend() -> None:
+    with pytest.raises(ValueError, match="Unknown table backend"):
+        extract_tables_from_soup(_TABLE_SOUP, backend="xpath")  # type: ignore[arg-type]
+
+
+def test_save_tables_as_csv(tmp_path: Path) -> None:
+    df = pd.DataFrame({"A": [1, 2], "B": [3, 4]})
+    save_tables_as_csv([df], tmp_path)
+    # Check CSV content
+    csv_file = next(tmp_path.glob("table_*.csv"))
+    loaded = pd.read_csv(csv_file)  # type: ignore[no-untyped-call]
+    assert list(loaded.columns) == list(df.columns) and np.array_equal(loaded.to_numpy(), df.to_numpy())
+
+
+def test_save_tables_as_csv_many_tables_and_failures(tmp_path: Path) -> None:
+    tables = [pd.DataFrame({"A": [i]}) for i in range(10)]
+    broken = mock.MagicMock()
+    broken.to_csv.side_effect = OSError("disk full")
+    tables.insert(3, broken)
+    save_tables_as_csv(tables, tmp_path)
+    # One failing table must not stop the others from being written
+    assert not (tmp_path / "table_4.csv").exists()
+    saved = sorted(tmp_path.glob("table_*.csv"), key=lambda p: int(p.stem.split("_")[1]))
+    assert len(saved) == 10
+    assert pd.read_csv(saved[-1])["A"].tolist() == [9]
+
+
+def test_save_tables_as_csv_thousand_tiny_tables(tmp_path: Path) -> None:
+    tables = [pd.DataFrame({"a": [i]}) for i in range(1000)]
+    save_tables_as_csv(tables, tmp_path)
+    assert len(list(tmp_path.glob("table_*.csv"))) == 1000
+    for i, df in enumerate(tables):
+        assert (tmp_path / f"table_{i + 1}.csv").read_text() == df.to_csv(index=False)
+
+
+def test_save_tables_as_csv_no_tables(tmp_path: Path) -> None:
+    save_tables_as_csv([], tmp_path)
+    assert list(tmp_path.iterdir()) == []